@@ -0,0 +1,104 @@
+"""Background jobs for LLM and search calls.
+
+Calls run on a worker pool shared by all sessions and are tracked by job ID in
+session state. The job ID is derived from the function and its arguments, so a
+rerun that asks for the same work again gets the job already in flight (or its
+finished result) instead of starting a new one, and the page stays interactive
+while a polling fragment waits for it. Pass a nonce to submit() for calls that
+must run fresh every time, such as benchmarks.
+
+The pool is created once per app process and shared by all of its sessions:
+beyond MAX_WORKERS concurrent calls, jobs queue behind other users' work. Apps that fan out set jobs.MAX_WORKERS before their first submit.
+Each session keeps at most MAX_JOBS finished jobs, evicting the least recently
+used.
+"""
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1
+from time import time, sleep
+
+MAX_WORKERS, MAX_JOBS, POLL_SECS = 8, 32, 0.5
+
+@st.cache_resource
+def get_pool(): return ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+def _jobs(): return st.session_state.setdefault("jobs", {})
+
+def _streams(): return st.session_state.setdefault("job_streams", {})
+
+def _job_id(fn, args, nonce): return sha1(repr((fn.__qualname__, args, nonce)).encode()).hexdigest()[:12]
+
+def _prune():
+    "Evict the least recently used finished jobs to make room for a new one within MAX_JOBS"
+    done = [k for k, f in _jobs().items() if f.done()]
+    for k in done[:max(0, len(_jobs()) + 1 - MAX_JOBS)]: _drop(k)
+
+def _drop(job_id):
+    _jobs().pop(job_id, None)
+    _streams().pop(job_id, None)
+
+def submit(fn, *args, nonce=None):
+    "Run fn(*args) on the pool unless the same job already exists; returns its job ID"
+    job_id = _job_id(fn, args, nonce)
+    if job_id not in _jobs():
+        _prune()
+        _jobs()[job_id] = get_pool().submit(fn, *args)
+    return job_id
+
+def _drain(fn, args, buf):
+    t = time()
+    for c in fn(*args):
+        if buf["ttft"] is None: buf["ttft"] = time() - t
+        buf["chunks"].append(c)
+    return "".join(buf["chunks"])
+
+def submit_stream(fn, *args, nonce=None):
+    "Like submit, for an fn that yields text chunks; the worker buffers them so stream() can replay them after a rerun"
+    job_id = _job_id(fn, args, nonce)
+    if job_id not in _jobs():
+        _prune()
+        buf = _streams()[job_id] = {"chunks": [], "ttft": None}
+        _jobs()[job_id] = get_pool().submit(_drain, fn, args, buf)
+    return job_id
+
+def stream(job_id):
+    "Yield a streamed job's chunks from the start, then live as they arrive, until the job finishes. Failed jobs are forgotten"
+    f, chunks, i = _jobs()[job_id], _streams()[job_id]["chunks"], 0
+    while True:
+        done = f.done()
+        while i < len(chunks):
+            yield chunks[i]
+            i += 1
+        if done: break
+        sleep(0.02)
+    if f.exception(): _drop(job_id)
+    f.result()
+
+def ttft(job_id):
+    "Seconds from a streamed job starting to its first chunk (None before it arrives)"
+    return _streams()[job_id]["ttft"]
+
+def result(job_id):
+    "Result of a finished job, or None while it is still running. Failed jobs are forgotten so they can be retried"
+    f = _jobs()[job_id] = _jobs().pop(job_id)  # move to the end, most recently used
+    if not f.done(): return None
+    if f.exception(): _drop(job_id)
+    return f.result()
+
+def forget():
+    "Drop all tracked jobs for this session (running ones finish in the background)"
+    _jobs().clear()
+    _streams().clear()
+
+@st.fragment(run_every=POLL_SECS)
+def poll(job_ids, msg):
+    "Show progress and rerun the app once every job in job_ids has finished"
+    n = sum(i not in _jobs() or _jobs()[i].done() for i in job_ids)
+    if n == len(job_ids): st.rerun()
+    st.caption(f":material/hourglass_top: {msg}" + (f" ({n}/{len(job_ids)})" if len(job_ids) > 1 else ""))
+
+def wait(job_id, msg):
+    "Result of job_id if finished, otherwise start polling for it and return None"
+    r = result(job_id)
+    if r is None: poll([job_id], msg)
+    return r
@@ -4,6 +4,10 @@ import json
 from snowflake.snowpark.functions import ai_complete
 from snowflake.snowpark import Session
 import pandas as pd
+import os
+import threading
+from uuid import uuid4
+import jobs
 
 # --- Config ---
 models = {
@@ -15,6 +19,14 @@ models = {
     "mixtral-8x7b": {"input": 0.23, "output": 0.35},
 }
 
+HISTORY_DIR = "comparison_history"  # Parquet dataset, one compacted file per day and model
+HISTORY_DAYS, TREND_WINDOW = 30, "7D"  # days shown in the trend charts, rolling window for their p95
+ALERT_DAYS, ALERT_BAND = 7, 0.25  # alert when last-day p95 moves >25% from the previous 7 days' p95
+ALERT_MIN_N = 5  # minimum results in both the last day and the baseline before alerting
+METRICS = {"latency": "latency", "total_cost_per_10k": "cost per 10k"}
+
+jobs.MAX_WORKERS = len(models) * 4  # room for four comparisons at once across all sessions
+
 # --- Helper Functions ---
 def call_llm_metrics(m, p):
     """Call LLM and return response with metrics."""
@@ -58,6 +70,63 @@ def render_charts(df):
     c2.caption("Cost per 10k (credits)"); c2.bar_chart(df["total_cost_per_10k"])
     c3.caption("Output Tokens"); c3.bar_chart(df["output_tokens"])
 
+@st.cache_resource
+def get_history_lock():
+    """Process-wide lock so concurrent sessions don't lose each other's rows when merging a partition."""
+    return threading.Lock()
+
+def save_results(rs):
+    """Append this run's metrics to the Parquet history, compacting each day/model partition into one file."""
+    now = pd.Timestamp.now(tz="UTC")
+    df = pd.DataFrame(rs).drop(columns="response").assign(ts=now)
+    with get_history_lock():
+        for m, rows in df.groupby("model"):
+            part = os.path.join(HISTORY_DIR, f"day={now:%Y-%m-%d}", f"model={m}")
+            path, tmp = os.path.join(part, "data.parquet"), os.path.join(part, f"_{uuid4().hex}.tmp")  # readers skip "_" files
+            os.makedirs(part, exist_ok=True)
+            rows = rows.drop(columns="model")
+            if os.path.exists(path): rows = pd.concat([pd.read_parquet(path), rows], ignore_index=True)
+            rows.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+    load_history.clear()
+
+@st.cache_data(ttl=300)
+def load_history():
+    """Load the metrics needed for the trend charts and alerts, oldest first."""
+    if not os.path.isdir(HISTORY_DIR): return pd.DataFrame()
+    since = pd.Timestamp.now(tz="UTC") - pd.Timedelta(TREND_WINDOW) - pd.Timedelta(days=HISTORY_DAYS)
+    h = pd.read_parquet(HISTORY_DIR, columns=["ts", "model", *METRICS], filters=[("day", ">=", f"{since:%Y-%m-%d}")])
+    return h.astype({"model": str}).sort_values("ts", ignore_index=True)
+
+def rolling_p95(h, metric):
+    """Rolling p95 of a metric per model, sampled once a day over the last HISTORY_DAYS for charting."""
+    r = h.set_index("ts").groupby("model")[metric].rolling(TREND_WINDOW).quantile(0.95)
+    r = r.unstack(0).resample("D").last()
+    return r[r.index > r.index.max() - pd.Timedelta(days=HISTORY_DAYS)]
+
+def find_alerts(h):
+    """Return (model, metric, change) where last-day p95 left the band around the baseline p95."""
+    now = h["ts"].max()
+    recent = h["ts"] > now - pd.Timedelta(days=1)
+    base = ~recent & (h["ts"] > now - pd.Timedelta(days=1 + ALERT_DAYS))
+    cur, ref = h[recent].groupby("model"), h[base].groupby("model")
+    n_cur, n_ref = cur.size(), ref.size().reindex(cur.size().index, fill_value=0)
+    enough = n_cur.index[(n_cur >= ALERT_MIN_N) & (n_ref >= ALERT_MIN_N)]
+    change = (cur[[*METRICS]].quantile(0.95) / ref[[*METRICS]].quantile(0.95) - 1).reindex(enough).stack()
+    return [(m, k, c) for (m, k), c in change[change.abs() > ALERT_BAND].items()]
+
+def render_history(c):
+    """Render regression alerts and p95 trend charts into container c."""
+    h = load_history()
+    if h.empty: return
+    with c:
+        for m, k, change in find_alerts(h):
+            st.warning(f"⚠️ **{m}**: p95 {METRICS[k]} {change:+.0%} vs the previous {ALERT_DAYS} days")
+        with st.expander(f"📈 History ({len(h):,} results)"):
+            c1, c2 = st.columns(2)
+            c1.caption(f"p95 latency, rolling {TREND_WINDOW}"); c1.line_chart(rolling_p95(h, "latency"))
+            c2.caption(f"p95 cost per 10k, rolling {TREND_WINDOW}"); c2.line_chart(rolling_p95(h, "total_cost_per_10k"))
+
 def render_card(r, w):
     """Render a single model result card."""
     with st.container(border=True):
@@ -76,21 +145,31 @@ s = Session.builder.configs(st.secrets["connections"]["snowflake"]).create()
 st.title(":material/compare: Comparing Model Performance")
 st.write("Write a prompt in the input box below, and you can see how a set of different LLMs compare when responding to it. The purpose of this app is to find the best model for your specific task.")
 
-p = st.chat_input(placeholder="Write a prompt to test")
-if not p: st.stop()  # Early exit if no prompt
+ss = st.session_state
+hist = st.container()
+if i := st.chat_input(placeholder="Write a prompt to test"):
+    ss["p"], ss["run"] = i, ss.get("run", 0) + 1
+if "p" not in ss:  # Early exit if no prompt
+    render_history(hist)
+    st.stop()
 
-# Run models with status
+# Run models as background jobs
+p = ss["p"]
 st.chat_message("user").write(p)
 
-with st.status("Running models...", expanded=True) as status:
-    rs = []
-    for m in [*models]:
-        st.write(f"🔄 Testing {m}...")
-        rs.append(call_llm_metrics(m, p))
-    st.write("📊 Generating report...")
-    status.update(label="Complete!", state="complete", expanded=False)
+# The run number makes every submit a fresh measurement, even for a repeated prompt
+ids = [jobs.submit(call_llm_metrics, m, p, nonce=ss["run"]) for m in models]
+rs = [jobs.result(i) for i in ids]
+if None in rs:  # Poll until every model has answered
+    jobs.poll(ids, "Running models...")
+    render_history(hist)
+    st.stop()
 
 # Generate report
+if ss.get("saved") != ss["run"]:  # Record each run once, not on every rerun
+    save_results(rs)
+    ss["saved"] = ss["run"]
+render_history(hist)
 w = get_winners(rs)
 df = pd.DataFrame(rs).set_index("model")
 
@@ -0,0 +1,101 @@
+"""Prompts and context formatting shared by the RAG apps and the offline evaluation suite.
+
+Templates are compiled into PromptTemplates once at import, so reruns only
+format their dynamic part.
+"""
+from prompt_prefix import PromptTemplate
+
+# ─── streamlit_rag1.py: single-question search ───
+SEARCH_SYSTEM_PROMPT = """You are a customer review analysis assistant. Your role is to ONLY answer questions about customer reviews and feedback.
+
+STRICT GUIDELINES:
+1. ONLY use information from the provided customer review context below
+2. If asked about topics unrelated to customer reviews, respond: "I can only answer questions about customer reviews. Please ask about product feedback, customer experiences, or review insights."
+3. If the context doesn't contain relevant information, say: "I don't have enough information in the customer reviews to answer that."
+4. Stay focused on: product features, customer satisfaction, complaints, praise, quality, pricing, shipping, or customer service mentioned in reviews
+5. Do NOT make up information or use knowledge outside the provided reviews
+6. Provide a clear, helpful answer based ONLY on the customer reviews above. If you cite information, mention it naturally."""
+
+SEARCH_PROMPT = """<system>
+{sys}
+</system>
+
+<context>
+{ctx}
+</context>
+
+<question>
+{question}
+</question>
+
+YOUR RESPONSE: """
+
+# ─── streamlit_rag2.py: conversational chatbot ───
+CHAT_SYSTEM_PROMPT = """You are a customer review analysis chatbot. Your role is to ONLY answer questions about customer reviews and feedback.
+
+STRICT GUIDELINES:
+1. ONLY use information from the provided customer review context below
+2. If asked about topics unrelated to customer reviews (e.g., general knowledge, coding, math, news), respond: "I can only answer questions about customer reviews. Please ask about product feedback, customer experiences, or review insights."
+3. If the context doesn't contain relevant information, say: "I don't have enough information in the customer reviews to answer that."
+4. Stay focused on: product features, customer satisfaction, complaints, praise, quality, pricing, shipping, or customer service mentioned in reviews
+5. Do NOT make up information or use knowledge outside the provided reviews
+6. Provide a clear, helpful answer based ONLY on the customer reviews above. If you cite information, mention it naturally.
+7. If the user's question cannot be answered with the provided context, ask them to be more specific and decline to answer the question."""
+
+CHAT_WELCOME = """Hello! I'm a customer review chatbot. Ask me anything about our products - I'll search through customer feedback to find relevant insights.
+
+We sell the following products: Thermal Gloves, Alpine Skis, Carbon Fiber Poles, Ski Goggles, Performance Racing Skis, Insulated Jackets, Avalanche Safety Packs, Mountain Series Helmets, Alpine Base Layers, and Pro Ski Boots."""
+
+REWRITE_PROMPT = """Based on the chat history below and the question, generate a search query that makes the question self-contained. Answer with only the query. Assume the reader of this query will have no knowledge of the chat history.
+
+<chat_history>
+{chat_history}
+</chat_history>
+
+<question>
+{question}
+</question>"""
+
+CHAT_PROMPT = """<system>
+{sys}
+</system>
+
+<context>
+{ctx}
+</context>
+
+<conversation>
+{conv}
+YOUR RESPONSE: """
+
+SEARCH = PromptTemplate(SEARCH_PROMPT, sys=SEARCH_SYSTEM_PROMPT)
+CHAT = PromptTemplate(CHAT_PROMPT, sys=CHAT_SYSTEM_PROMPT)
+REWRITE = PromptTemplate(REWRITE_PROMPT)
+
+# ─── Formatting ───
+def flag_valid(results, threshold):
+    "Copy search results with a valid flag based on cosine similarity threshold"
+    return [dict(c, valid=c["@scores"]["cosine_similarity"] >= threshold) for c in results]
+
+def fmt_ctx(chunks):
+    "Format the valid chunks as source-labelled context"
+    return "\n\n".join([f"### Source: {c['FILE_NAME']} ###\n{c['CHUNK_TEXT']}" for c in chunks if c["valid"]])
+
+def fmt_ms(ms): return "\n\n".join([f"{m['role']}: {m['content']}" for m in ms])
+
+def search_prompt(question, chunks):
+    "Build the single-question RAG prompt from the valid chunks"
+    return SEARCH.format(ctx=fmt_ctx(chunks), question=question)
+
+def needs_rewrite(ms):
+    "Only follow-ups (beyond system, welcome and first question) get rewritten"
+    return len(ms) > 3
+
+def rewrite_prompt(ms, question, slide_window):
+    "Build the query-rewrite prompt from the last slide_window messages"
+    start = max(0, len(ms) - slide_window)
+    return REWRITE.format(chat_history=fmt_ms(ms[start:]), question=question)
+
+def chat_prompt(ms, chunks):
+    "Build the chat RAG prompt from the valid chunks and the whole conversation after the system message"
+    return CHAT.format(ctx=fmt_ctx(chunks), conv=fmt_ms(ms[1:]))
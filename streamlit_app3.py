@@ -3,6 +3,7 @@ import streamlit as st
 from snowflake.snowpark import Session
 from snowflake.cortex import complete
 from time import time
+from prompt_prefix import PromptTemplate
 import json
 
 # Cached Functions
@@ -15,6 +16,10 @@ def call_cortex_llm(prompt):
     response = complete(session=s, model=m, prompt=prompt)
     return json.loads(response)
 
+@st.cache_resource
+def get_template():
+    return PromptTemplate(PROMPT_TEMPLATE)
+
 # Validation Function
 def validate_inputs(description):
     if not description:
@@ -37,14 +42,12 @@ def generate_with_status(prompt):
 # Setup
 s = get_session()
 m = "claude-3-5-sonnet"
+
+# Static instructions and example come first so every call shares the same prompt prefix
 PROMPT_TEMPLATE = """
 <task>
 
-You are a Streamlit theming expert. Generate a complete config.toml file for a Streamlit app based on these requirements:
-
-- Base color preference: {base_color}
-- Style description: {description}
-- Creativity level: {creativity}/10 (higher = more experimental color choices)
+You are a Streamlit theming expert. Generate a complete config.toml file for a Streamlit app based on the user preferences given at the end of this prompt.
 
 Requirements:
 1. Include both [theme.light] and [theme.dark] sections
@@ -97,8 +100,19 @@ secondaryBackgroundColor = "#1a1a2e"
 borderColor = "#00a3e0"
 
 </example>
+
+
+<preferences>
+
+- Base color preference: {base_color}
+- Style description: {description}
+- Creativity level: {creativity}/10 (higher = more experimental color choices)
+
+</preferences>
 """
 
+T = get_template()
+
 # Interface
 st.title(":material/palette: AI Theme Generator")
 st.write("Generate custom Streamlit themes using AI. Describe your desired look and let Cortex create a config.toml for you.")
@@ -121,7 +135,7 @@ with st.sidebar:
 if submitted:
     validate_inputs(description)
     
-    prompt = PROMPT_TEMPLATE.format(
+    prompt = T.format(
         base_color=base_color,
         description=description,
         creativity=creativity
@@ -132,6 +146,7 @@ if submitted:
     query_time = time() - response_sent
 
     with st.expander("View Prompt"):
+        st.caption(T.summary(prompt))
         st.markdown(prompt)
     
     with st.container(border=True):
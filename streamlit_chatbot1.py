@@ -2,6 +2,7 @@ import streamlit as st
 from snowflake.snowpark import Session
 from snowflake.snowpark.functions import ai_complete
 import json
+import jobs
 
 @st.cache_resource
 def get_session(): return Session.builder.configs(st.secrets["connections"]["snowflake"]).create()
@@ -45,29 +46,35 @@ with st.expander("How input handling works", expanded=False):
         # Display user message immediately
         st.chat_message("user").write(prompt)
         ss["ms"].append({"role": "user", "content": prompt})
-        
+
+    # A user message without a reply means an answer is pending
+    if ss["ms"] and ss["ms"][-1]["role"] == "user":
         # Build conversation history string
         p = "\\n\\n".join([f'{m["role"]}: {m["content"]}' for m in ss["ms"]]) + "\\n\\nassistant:"
-        
-        # Call LLM and display response
-        r = call_llm(p)
-        st.chat_message("assistant").write(r)
-        ss["ms"].append({"role": "assistant", "content": r})
+
+        # Run the LLM call in the background and display the response once it's ready
+        with st.chat_message("assistant"):
+            r = jobs.wait(jobs.submit(call_llm, p), "Thinking...")
+            if r is not None: st.write(r)
+        if r is not None: ss["ms"].append({"role": "assistant", "content": r})
     ```
     The walrus operator (`:=`) assigns and checks the input in one line. We display 
     messages **inline** for immediate feedback, then append to history for persistence.
+    The LLM call runs in a background job, so the page stays interactive while it works; 
+    a polling fragment reruns the app when the answer is ready.
     """)
 
 if i := st.chat_input("Type a message..."):
     st.chat_message("user").write(i)
     ss["ms"].append({"role": "user", "content": i})
-    
+
+if ss["ms"] and ss["ms"][-1]["role"] == "user":
     p = "\n\n".join([f'{m["role"]}: {m["content"]}' for m in ss["ms"]]) + "\n\nassistant:"
     
-    with st.spinner("Thinking..."): r = call_llm(p)
-    
-    st.chat_message("assistant").write(r)
-    ss["ms"].append({"role": "assistant", "content": r})
+    with st.chat_message("assistant"):
+        r = jobs.wait(jobs.submit(call_llm, p), "Thinking...")
+        if r is not None: st.write(r)
+    if r is not None: ss["ms"].append({"role": "assistant", "content": r})
 
 with st.sidebar:
     st.header("Debug View")
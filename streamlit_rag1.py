@@ -3,35 +3,13 @@ import streamlit as st, json
 from snowflake.snowpark import Session
 from snowflake.snowpark.functions import ai_complete
 from snowflake.core import Root
+from rag_prompts import SEARCH, flag_valid, search_prompt
+import jobs
 
 # ─── 2. CONFIGURATION ───
 DB, SCHEMA, CSS_NAME = "RAG_DB", "RAG_SCHEMA", "CUSTOMER_REVIEW_SEARCH"
 MODEL, N_RESULTS = "claude-3-5-sonnet", 10
 
-SYSTEM_PROMPT = """You are a customer review analysis assistant. Your role is to ONLY answer questions about customer reviews and feedback.
-
-STRICT GUIDELINES:
-1. ONLY use information from the provided customer review context below
-2. If asked about topics unrelated to customer reviews, respond: "I can only answer questions about customer reviews. Please ask about product feedback, customer experiences, or review insights."
-3. If the context doesn't contain relevant information, say: "I don't have enough information in the customer reviews to answer that."
-4. Stay focused on: product features, customer satisfaction, complaints, praise, quality, pricing, shipping, or customer service mentioned in reviews
-5. Do NOT make up information or use knowledge outside the provided reviews
-6. Provide a clear, helpful answer based ONLY on the customer reviews above. If you cite information, mention it naturally."""
-
-PROMPT = """<system>
-{sys}
-</system>
-
-<context>
-{ctx}
-</context>
-
-<question>
-{question}
-</question>
-
-YOUR RESPONSE: """
-
 # ─── 3. FUNCTIONS ───
 @st.cache_resource
 def get_session():
@@ -49,18 +27,9 @@ def get_css(_s):
 
 def call_llm(p): return json.loads(S.range(1).select(ai_complete(MODEL, p)).collect()[0][0])
 
-def search_css(q, threshold):
-    "Query CSS, add valid flag based on cosine similarity threshold"
-    results = css.search(query=q, columns=cols, limit=N_RESULTS).results
-    for c in results:
-        c["valid"] = c["@scores"]["cosine_similarity"] >= threshold
-    return results
-
-def fmt_prompt(question, chunks):
-    "Build RAG prompt with system instructions and valid context chunks"
-    valid_chunks = [c for c in chunks if c["valid"]]
-    ctx = "\n\n".join([f"### Source: {c['FILE_NAME']} ###\n{c['CHUNK_TEXT']}" for c in valid_chunks])
-    return PROMPT.format(sys=SYSTEM_PROMPT, ctx=ctx, question=question)
+def search_css(q):
+    "Query CSS for the top N_RESULTS chunks"
+    return css.search(query=q, columns=cols, limit=N_RESULTS).results
 
 def show_ctx(ctx):
     "Display retrieved chunks with valid/invalid indicators"
@@ -92,7 +61,10 @@ st.info("""Ask a question about our products and we'll search customer reviews f
 
 # ─── 7. INPUT HANDLING ───
 if q := st.text_input("What would you like to know about our products?"):
-    ctx = search_css(q, min_cos)
+    results = jobs.wait(jobs.submit(search_css, q), "Searching reviews...")
+    if results is None: st.stop()  # Search still running, the poller reruns when it's done
+
+    ctx = flag_valid(results, min_cos)
     valid_ctx = [c for c in ctx if c["valid"]]
 
     if not valid_ctx:
@@ -100,12 +72,14 @@ if q := st.text_input("What would you like to know about our products?"):
         st.stop()
 
     try:
-        with st.spinner("Searching reviews and generating answer..."):
-            r = call_llm(fmt_prompt(q, ctx))
+        p = search_prompt(q, ctx)
+        r = jobs.wait(jobs.submit(call_llm, p), "Generating answer...")
+        if r is None: st.stop()
 
         st.subheader("Answer")
         with st.container(border=True):
             st.markdown(r)
+        st.caption(SEARCH.summary(p))
         show_ctx(ctx)
 
     except Exception as e:
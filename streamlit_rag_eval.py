@@ -0,0 +1,150 @@
+# ─── 1. IMPORTS ───
+import streamlit as st, json, re, itertools
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from prompt_prefix import n_tokens
+from rag_prompts import CHAT_SYSTEM_PROMPT, CHAT_WELCOME, flag_valid, needs_rewrite, rewrite_prompt, chat_prompt
+
+# ─── 2. CONFIGURATION ───
+SNAPSHOT = "rag_eval_snapshot.json"
+PRICE = {"input": 1.50, "output": 7.50}  # claude-3-5-sonnet credits per 1M tokens, as in llm_comparison_tool.py
+FAKE_TTFT, FAKE_SECS_PER_1K = 0.05, 0.02  # modelled latency of the fake LLM
+MAX_WORKERS = 8
+
+NO_INFO = "I don't have enough information in the customer reviews to answer that."
+
+INFO_TEXT = """Sweeps `N_RESULTS`, `SLIDE_WINDOW` and `min_cos` over a fixed question set and scores each combination on retrieval recall@k, answer groundedness, input tokens and end-to-end latency.
+
+Prompts are built with the same `rag_prompts` functions as `streamlit_rag2.py`: follow-up questions go through the rewrite step (the only place `SLIDE_WINDOW` applies), then the answer prompt carries the whole conversation.
+
+Everything runs **offline**: search results come from a local snapshot of Cortex Search output and answers come from a fake LLM that quotes the context it is given. Latency is modelled from token counts rather than timed, so the same grid always gives the same frontier.
+
+**Snapshot format:** `{"questions": [{"question", "sources", "history"?, "results"}]}` where `results` is the list returned by `css.search(...)` with the largest `limit` you plan to sweep, and `sources` are the `FILE_NAME`s a good answer should use (empty for questions the reviews can't answer).
+"""
+
+# ─── 3. FUNCTIONS ───
+def words(t): return re.findall(r"[a-z0-9']+", t.lower())
+
+@st.cache_data
+def load_snapshot(raw):
+    "Parse snapshot JSON and sort each question's results by similarity"
+    qs = json.loads(raw)["questions"]
+    for q in qs:
+        q["results"] = sorted(q["results"], key=lambda c: c["@scores"]["cosine_similarity"], reverse=True)
+    return qs
+
+def search_css(q, n_results):
+    "Offline stand-in for Cortex Search: the top n_results chunks from the snapshot"
+    return q["results"][:n_results]
+
+def get_messages(q):
+    "Session messages as streamlit_rag2.py holds them when the question is asked"
+    return [
+        dict(role="system", content=CHAT_SYSTEM_PROMPT), dict(role="assistant", content=CHAT_WELCOME),
+        *q.get("history", []), dict(role="user", content=q["question"]),
+    ]
+
+def call_llm(p):
+    "Fake LLM: echo the question for rewrites, otherwise quote the first sentence of every context chunk"
+    if "<context>" not in p: r = p.split("<question>")[1].split("</question>")[0].strip()
+    else:
+        ctx = p.split("<context>")[1].split("</context>")[0]
+        chunks = [c.strip() for c in re.split(r"### Source: .+? ###", ctx) if c.strip()]
+        r = " ".join([re.split(r"(?<=[.!?])\s", c)[0] for c in chunks]) or NO_INFO
+    return r
+
+def fake_latency(p, r):
+    "Modelled seconds for the fake LLM to answer p with r"
+    return FAKE_TTFT + (n_tokens(p) + n_tokens(r)) / 1000 * FAKE_SECS_PER_1K
+
+def recall(used, q):
+    "Share of expected sources passed to the LLM; with none expected, 1.0 only if nothing was passed"
+    if not q["sources"]: return float(not used)
+    return len(used & set(q["sources"])) / len(q["sources"])
+
+def groundedness(r, q):
+    "Share of answer words that appear in the expected source chunks; with none expected, 1.0 for a refusal"
+    if not q["sources"]: return float(r == NO_INFO)
+    src = {w for c in q["results"] if c["FILE_NAME"] in q["sources"] for w in words(c["CHUNK_TEXT"])}
+    ws = words(r)
+    return sum(w in src for w in ws) / len(ws) if r != NO_INFO and ws else 0.0
+
+def evaluate(qs, n_results, slide_window, min_cos):
+    "Run every question through rewrite → search_css → chat_prompt → call_llm and average the metrics"
+    rows = []
+    for q in qs:
+        ms, input_t, output_t, latency = get_messages(q), 0, 0, 0.0
+        if needs_rewrite(ms):
+            # The snapshot holds the results for the rewritten query, so only the rewrite's cost is modelled
+            rp = rewrite_prompt(ms, q["question"], slide_window)
+            rr = call_llm(rp)
+            input_t, output_t, latency = n_tokens(rp), n_tokens(rr), fake_latency(rp, rr)
+        ctx = flag_valid(search_css(q, n_results), min_cos)
+        p = chat_prompt(ms, ctx)
+        r = call_llm(p)
+        latency += fake_latency(p, r)
+        used = {c["FILE_NAME"] for c in ctx if c["valid"]}
+        input_t, output_t = input_t + n_tokens(p), output_t + n_tokens(r)
+        rows.append({
+            "recall": recall(used, q),
+            "groundedness": groundedness(r, q),
+            "input_tokens": input_t, "latency": latency,
+            "cost_per_10k": (input_t * PRICE["input"] + output_t * PRICE["output"]) / 1_000_000 * 10_000,
+        })
+    m = pd.DataFrame(rows).mean()
+    return {
+        "N_RESULTS": n_results, "SLIDE_WINDOW": slide_window, "min_cos": min_cos,
+        "recall@k": m["recall"], "groundedness": m["groundedness"],
+        "quality": (m["recall"] + m["groundedness"]) / 2,
+        "input_tokens": m["input_tokens"], "latency": m["latency"], "cost_per_10k": m["cost_per_10k"],
+    }
+
+def sweep(qs, grid):
+    "Evaluate every parameter combination in parallel"
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        return pd.DataFrame(ex.map(lambda g: evaluate(qs, *g), grid))
+
+def pareto(df):
+    "Flag configs that no other config beats on quality, latency and cost at the same time"
+    def dominated(r):
+        better_eq = (df["quality"] >= r["quality"]) & (df["latency"] <= r["latency"]) & (df["cost_per_10k"] <= r["cost_per_10k"])
+        better = (df["quality"] > r["quality"]) | (df["latency"] < r["latency"]) | (df["cost_per_10k"] < r["cost_per_10k"])
+        return (better_eq & better).any()
+    return df.assign(frontier=[not dominated(r) for _, r in df.iterrows()])
+
+# ─── 4. SIDEBAR ───
+with st.sidebar:
+    st.header("Parameter Grid")
+    n_results = st.multiselect("N_RESULTS", [3, 5, 10, 15, 20], default=[3, 5, 10])
+    slide_window = st.multiselect("SLIDE_WINDOW", [2, 4, 8, 12], default=[2, 12])
+    lo, hi = st.slider("min_cos range", min_value=0.25, max_value=0.75, value=(0.25, 0.75), step=0.05)
+    step = st.select_slider("min_cos step", options=[0.05, 0.10, 0.25], value=0.10)
+    st.divider()
+    upload = st.file_uploader("Chunk snapshot (JSON)", type="json")
+
+# ─── 5. MAIN CONTENT ───
+st.title("RAG Evaluation Suite")
+st.info(INFO_TEXT)
+
+raw = upload.getvalue().decode() if upload else open(SNAPSHOT).read()
+qs = load_snapshot(raw)
+cos = [round(lo + i * step, 2) for i in range(int((hi - lo) / step + 1e-9) + 1)]
+grid = [*itertools.product(n_results, slide_window, cos)]
+st.caption(f"{len(qs)} questions × {len(grid)} configurations")
+
+if not grid: st.stop()  # Early exit if a grid axis is empty
+
+if st.button("Run sweep", type="primary"):
+    with st.spinner(f"Evaluating {len(grid)} configurations..."):
+        df = pareto(sweep(qs, grid))
+
+    st.subheader("Pareto Frontier")
+    st.caption("Configurations where quality can't be improved without paying more latency or cost.")
+    st.dataframe(df[df["frontier"]].drop(columns="frontier").sort_values("quality", ascending=False), hide_index=True)
+
+    c1, c2 = st.columns(2)
+    c1.caption("Quality vs latency (seconds)"); c1.scatter_chart(df, x="latency", y="quality", color="frontier")
+    c2.caption("Quality vs cost per 10k (credits)"); c2.scatter_chart(df, x="cost_per_10k", y="quality", color="frontier")
+
+    with st.expander("All configurations"):
+        st.dataframe(df, hide_index=True)